@@ -0,0 +1,94 @@
+import io
+import os
+import sys
+import timeit
+import random
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen.canvas import Canvas
+from reportlab.graphics.shapes import Drawing
+
+from source.chartTemplates import ChartTemplates
+
+WIDTH, HEIGHT = A4
+
+FONT_PATH = os.path.join(os.path.dirname(__file__), '..', 'resources', 'fonts', 'CONSOLA.TTF')
+
+# Seeded, so every run draws the same charts
+RANDOM = random.Random(29)
+
+BAR_CHART_DATA = {
+    'category_names': [str(year) for year in range(2014, 2024)],
+    'values': [
+        [RANDOM.uniform(50000, 250000) for _ in range(10)],
+        [RANDOM.uniform(-10000, 80000) for _ in range(10)]
+    ]
+}
+
+PROFILES = [
+    {'color': color, 'data': [RANDOM.uniform(-20, 400) for _ in range(120)]}
+    for color in ['#FF0000', '#F6BE00', '#0044CC']
+]
+
+
+def draw(canvas: Canvas, chart) -> None:
+    drawing = Drawing(width=WIDTH - 64, height=chart.height)
+    drawing.add(chart)
+    drawing.drawOn(canvas=canvas, x=32, y=64)
+
+
+def render_fresh(canvas: Canvas) -> None:
+    draw(canvas, ChartTemplates.bind_vertical_bar_chart(
+        ChartTemplates.create_vertical_bar_chart(width=WIDTH - 83.2), BAR_CHART_DATA, 175))
+    draw(canvas, ChartTemplates.bind_line_chart(
+        ChartTemplates.create_line_chart(width=WIDTH - 83.2), PROFILES, 400))
+
+
+def render_template(canvas: Canvas) -> None:
+    draw(canvas, ChartTemplates.bind_vertical_bar_chart(
+        ChartTemplates.vertical_bar_chart(width=WIDTH - 83.2), BAR_CHART_DATA, 175))
+    draw(canvas, ChartTemplates.bind_line_chart(
+        ChartTemplates.line_chart(width=WIDTH - 83.2), PROFILES, 400))
+
+
+def measure(render, number: int, repeat: int) -> list:
+    timings = []
+
+    # Every repeat draws onto a canvas of its own, so no variant pays for the pages of another
+    for _ in range(repeat):
+        canvas = Canvas(io.BytesIO(), pagesize=A4)
+        timings.append(timeit.timeit(lambda: render(canvas), number=number) / number * 1000)
+
+    return timings
+
+
+def main(number: int = 100, repeat: int = 7) -> None:
+    pdfmetrics.registerFont(TTFont(name=ChartTemplates.FONT_NAME, filename=FONT_PATH))
+
+    variants = [('fresh charts', render_fresh), ('chart templates', render_template)]
+
+    # Both orders, so warming up in the first variant does not favour the second
+    for order in [variants, variants[::-1]]:
+        for name, render in order:
+            timings = measure(render=render, number=number, repeat=repeat)
+            print(f'{name}: {statistics.median(timings):.3f} ms per report, '
+                  f'{min(timings):.3f} to {max(timings):.3f} ms over {repeat} runs of {number} reports')
+
+        print()
+
+    # The part templates actually save, drawing the charts is the same for both variants
+    timings = measure(render=lambda canvas: (
+        ChartTemplates.create_vertical_bar_chart(width=WIDTH - 83.2),
+        ChartTemplates.create_line_chart(width=WIDTH - 83.2)
+    ), number=number, repeat=repeat)
+    print(f'building both charts: {statistics.median(timings):.3f} ms per report, '
+          f'{min(timings):.3f} to {max(timings):.3f} ms over {repeat} runs of {number} reports')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import os
+import sys
+import base64
+import random
+import tempfile
+from datetime import date
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+
+sys.path.insert(0, ROOT)
+
+# The report reads its fonts, images and temp directory relative to the repository
+os.chdir(ROOT)
+
+# Alpha Vantage is never called, every company comes from the snapshot below
+os.environ.setdefault('ALPHA_VANTAGE_API_KEY', 'benchmark')
+
+from source.companyApi import CompanyApi
+from source.memoryBudget import MemoryBudget
+from source.report import Report
+from source.snapshot import Snapshot
+from main import remove_all_temp_files
+
+# Seeded, so every run renders the same reports
+RANDOM = random.Random(30)
+
+COMPANIES = 50
+
+
+def statements(count: int, months: int, fields: list) -> list:
+    today = date.today()
+
+    return [
+        {
+            'fiscalDateEnding': date(today.year - 1 - (i * months) // 12, 12 - (i * months) % 12, 28).isoformat(),
+            **{field: str(RANDOM.randint(10 ** 8, 10 ** 10)) for field in fields}
+        }
+        for i in range(count)
+    ]
+
+
+def company(ticker: str, logo: str) -> dict:
+    return {
+        'ticker': ticker,
+        'exchange': 'US',
+        'info': {
+            'quoteType': 'EQUITY',
+            'currency': 'USD',
+            'shortName': f'{ticker} Corporation',
+            'symbol': ticker,
+            'longBusinessSummary': ' '.join(RANDOM.choice(['revenue', 'cloud', 'software', 'devices']) for _ in range(200)),
+            'totalRevenue': RANDOM.randint(10 ** 9, 10 ** 11),
+            'ebitdaMargins': RANDOM.random(),
+            'marketCap': RANDOM.randint(10 ** 10, 10 ** 12),
+            'trailingPE': RANDOM.uniform(5, 50),
+        },
+        'incomeStatements': {
+            'annualReports': statements(10, 12, ['totalRevenue', 'netIncome', 'netIncomeMargin']),
+            'quarterlyReports': statements(8, 3, ['totalRevenue', 'netIncome', 'netIncomeMargin']),
+        },
+        'cashFlowStatements': {
+            'annualReports': statements(10, 12, ['operatingCashflow', 'freeCashFlowEstimate']),
+            'quarterlyReports': statements(8, 3, ['operatingCashflow', 'freeCashFlowEstimate']),
+        },
+        'logo': logo,
+    }
+
+
+def build_snapshot(directory: str) -> str:
+    with open(Report.LOGO_PATH, 'rb') as f:
+        logo = base64.b64encode(f.read()).decode('ascii')
+
+    tickers = [f'T{i:03d}' for i in range(COMPANIES)]
+
+    return Snapshot.write(
+        companies={Snapshot.company_key(ticker, 'US'): company(ticker, logo) for ticker in tickers},
+        prices={
+            ticker: [RANDOM.uniform(10, 500) for _ in range(120)]
+            for ticker in tickers + [ticker['ticker'] for ticker in Report.TICKERS_TO_COMPARE]
+        },
+        directory=directory
+    )
+
+
+def main(reports: int = 1000) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        snapshot = Snapshot.load(build_snapshot(directory))
+        budget = MemoryBudget(limit_mb=1024)
+        budget.start()
+
+        # Renders reports one after another in a single process, like a long running service would
+        for i in range(1, reports + 1):
+            path = os.path.join(directory, 'report.pdf')
+            report = Report(
+                company=CompanyApi(ticker=f'T{i % COMPANIES:03d}', exchange='US', snapshot=snapshot),
+                path=path
+            )
+            report.save()
+            os.remove(path)
+
+            if i == 1 or i % max(1, reports // 10) == 0:
+                current, peak = budget.usage_mb()
+                print(f'{i} reports: {current:.1f} MB in use, {peak:.1f} MB at peak')
+
+        snapshot.report()
+        snapshot.close()
+        remove_all_temp_files()
+
+
+if __name__ == "__main__":
+    main(reports=int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
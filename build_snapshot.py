@@ -0,0 +1,62 @@
+import sys
+import argparse
+from dotenv import load_dotenv
+
+from source.report import Report
+from source.snapshot import Snapshot
+from source.snapshotBuilder import SnapshotBuilder
+
+
+def main():
+    # Create parser and add arguments
+    parser = argparse.ArgumentParser(
+        prog='Company Introduction Snapshot',
+        description='Fetches the data of every company in a universe file and saves it as a read-only snapshot that reports can be generated from without any network calls',
+    )
+
+    parser.add_argument(
+        "universe",
+        help="file with one TICKER,EXCHANGE per line, for example MSFT,US"
+    )
+
+    parser.add_argument(
+        "--output",
+        default=Snapshot.PATH,
+        help=f"directory to save the snapshot in (default: {Snapshot.PATH})"
+    )
+
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=SnapshotBuilder.WORKERS,
+        help=f"number of companies fetched concurrently (default: {SnapshotBuilder.WORKERS})"
+    )
+
+    for service, rate in SnapshotBuilder.REQUESTS_PER_MINUTE.items():
+        parser.add_argument(
+            f"--{service.replace('_', '-')}-rate",
+            dest=service,
+            metavar="PER_MINUTE",
+            type=float,
+            default=rate,
+            help=f"maximum requests per minute to {service.replace('_', ' ').title()} (default: {rate})"
+        )
+
+    try:
+        args = parser.parse_args()
+        load_dotenv()
+
+        builder = SnapshotBuilder(
+            universe=SnapshotBuilder.read_universe(path=args.universe),
+            comparison_tickers=[ticker['ticker'] for ticker in Report.TICKERS_TO_COMPARE],
+            workers=args.workers,
+            requests_per_minute={service: getattr(args, service) for service in SnapshotBuilder.REQUESTS_PER_MINUTE}
+        )
+
+        builder.build(directory=args.output)
+    except Exception as e:
+        sys.exit(e)
+
+
+if __name__ == "__main__":
+    main()
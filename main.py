@@ -8,6 +8,9 @@ from typing import Optional, Dict, Any
 
 from source.report import Report
 from source.companyApi import CompanyApi
+from source.reportArchive import ReportArchive
+from source.memoryBudget import MemoryBudget
+from source.snapshot import Snapshot
 
 
 def main():
@@ -19,6 +22,7 @@ def main():
 
     parser.add_argument(
         "query",
+        nargs="?",
         help="The query to search for, can be company name or ticker."
     )
 
@@ -27,18 +31,108 @@ def main():
         action="store_true",
         help="overwrite existing report from today"
     )
+
+    archive_query = parser.add_mutually_exclusive_group()
+
+    archive_query.add_argument(
+        "--history",
+        metavar="SYMBOL",
+        help="print archived metrics from previous reports for a ticker symbol"
+    )
+
+    archive_query.add_argument(
+        "--top",
+        metavar="METRIC",
+        choices=ReportArchive.METRICS,
+        help="print the archived companies with the highest value of a metric"
+    )
+
+    parser.add_argument(
+        "--metric",
+        action="append",
+        choices=ReportArchive.METRICS,
+        help="metric to include with --history, can be repeated (default: all)"
+    )
+
+    parser.add_argument(
+        "--last",
+        type=int,
+        default=10,
+        help="number of previous reports to include with --history (default: 10)"
+    )
+
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=50,
+        help="number of companies to include with --top (default: 50)"
+    )
+
+    parser.add_argument(
+        "--date",
+        help="archive date (YYYY-MM-DD) to rank with --top (default: latest)"
+    )
+
+    parser.add_argument(
+        "--memory-budget",
+        metavar="MB",
+        type=float,
+        help="trace memory usage while generating a report and exit with an error if it ends over a budget in megabytes"
+    )
+
+    parser.add_argument(
+        "--snapshot",
+        action="store_true",
+        help="generate the report from the latest snapshot made with build-snapshot instead of fetching data"
+    )
+
+    parser.add_argument(
+        "--snapshot-path",
+        metavar="PATH",
+        help="generate the report from a specific snapshot file, implies --snapshot"
+    )
     
     try:
         args = parser.parse_args()
+        if args.last < 1:
+            parser.error("argument --last: has to be at least 1")
+
+        if args.limit < 1:
+            parser.error("argument --limit: has to be at least 1")
+
+        if args.history or args.top:
+            return query_archive(args=args)
+
+        if args.query is None:
+            parser.error("the following arguments are required: query")
+
+        budget = None
+
+        # Memory is only traced while generating a report, archive queries return above
+        if args.memory_budget is not None:
+            budget = MemoryBudget(limit_mb=args.memory_budget)
+            budget.start()
+
         load_dotenv()
-        check_internet_connection()
-        selected_option = search_ticker_and_present_options(query=args.query)
+        snapshot = None
+        options = []
+
+        if args.snapshot or args.snapshot_path:
+            snapshot = Snapshot.load(path=args.snapshot_path)
+            options = snapshot.search(query=args.query)
+
+        if options:
+            selected_option = present_options(options=options)
+        else:
+            check_internet_connection()
+            selected_option = search_ticker_and_present_options(query=args.query)
+
         filepath = generate_file_path(ticker_symbol=selected_option["Code"], exchange=selected_option["Exchange"])
         
         print(f'Generating a report for {selected_option["Name"]} ({selected_option["Exchange"]})...')
         
          # Initalize a new CompanyApi and Report
-        company = CompanyApi(ticker=selected_option['Code'], exchange=selected_option['Exchange'])
+        company = CompanyApi(ticker=selected_option['Code'], exchange=selected_option['Exchange'], snapshot=snapshot)
         report = Report(company=company, path=filepath)
         
     except Exception as e:
@@ -46,10 +140,66 @@ def main():
 
     # Save report
     report.save()
+
+    # Archive the metrics behind the report for later queries
+    try:
+        ReportArchive().append(company=company)
+    except Exception as e:
+        print(f"Could not archive the metrics of {company.get_symbol()}: {e}")
     
     # Remove all temporary files created
     remove_all_temp_files()
 
+    if snapshot is not None:
+        snapshot.report()
+        snapshot.close()
+
+    if budget is not None:
+        within_budget = budget.check()
+        budget.report()
+
+        if not within_budget:
+            sys.exit(f"Memory in use is over the budget of {budget.limit_mb:.1f} MB, even after clearing the caches.")
+
+
+def query_archive(args: argparse.Namespace) -> None:
+    archive = ReportArchive()
+
+    try:
+        if args.history:
+            rows = archive.history(symbol=args.history, metrics=args.metric, last=args.last)
+        else:
+            rows = archive.top(metric=args.top, limit=args.limit, on=args.date)
+    except Exception as e:
+        sys.exit(e)
+
+    if not rows and args.history:
+        sys.exit(f'No archived reports found for ticker symbol "{args.history.upper()}".')
+    elif not rows:
+        sys.exit(f'No archived companies have a value for {args.top} on {args.date or "the latest date"}.')
+
+    print_table(rows=rows)
+
+
+def print_table(rows: list) -> None:
+    columns = list(rows[0].keys())
+    cells = [[format_cell(row[column]) for column in columns] for row in rows]
+    widths = [max(len(column), *(len(cell[i]) for cell in cells)) for i, column in enumerate(columns)]
+
+    print("  ".join(column.ljust(widths[i]) for i, column in enumerate(columns)))
+
+    for cell in cells:
+        print("  ".join(value.ljust(widths[i]) for i, value in enumerate(cell)))
+
+
+def format_cell(value: Any) -> str:
+    if value is None:
+        return "N/A"
+    elif isinstance(value, float):
+        return f"{value:,.4f}"
+
+    return str(value)
+
 
 def check_internet_connection()-> None:
     try:
@@ -65,7 +215,12 @@ def search_ticker_and_present_options(query=str)-> Optional[Dict[str, int]]:
     
     if not len(options): 
         raise ValueError(f'Can not find any companies matching "{query}".')
-    elif len(options) == 1: 
+
+    return present_options(options=options)
+
+
+def present_options(options: list) -> Optional[Dict[str, int]]:
+    if len(options) == 1: 
         return options[0]
     
     print("Please choose from the following options:")
@@ -0,0 +1,95 @@
+import threading
+from typing import Tuple
+
+from reportlab.lib import colors
+from reportlab.lib.colors import HexColor
+from reportlab.graphics.charts.barcharts import VerticalBarChart
+from reportlab.graphics.charts.linecharts import HorizontalLineChart
+
+
+class ChartTemplates(object):
+    FONT_NAME = 'Consola'
+
+    BACKGROUND_COLOR = HexColor("#f5f5f5")
+
+    # Only building and styling the charts is saved, reportlab still lays out the axes,
+    # background and lines on every draw. Charts are mutated when data is bound, so every
+    # thread gets its own templates.
+    local = threading.local()
+
+    @classmethod
+    def vertical_bar_chart(cls, width: float) -> VerticalBarChart:
+        return cls.get_template(('vertical_bar_chart', width), cls.create_vertical_bar_chart)
+
+    @classmethod
+    def line_chart(cls, width: float) -> HorizontalLineChart:
+        return cls.get_template(('line_chart', width), cls.create_line_chart)
+
+    @classmethod
+    def get_template(cls, key: Tuple[str, float], create) -> object:
+        if not hasattr(cls.local, 'templates'):
+            cls.local.templates = {}
+
+        if key not in cls.local.templates:
+            cls.local.templates[key] = create(width=key[1])
+
+        return cls.local.templates[key]
+
+    @classmethod
+    def create_vertical_bar_chart(cls, width: float) -> VerticalBarChart:
+        chart = VerticalBarChart()
+        chart.strokeColor = colors.white
+        chart.width = width
+
+        chart.bars[0].fillColor = colors.black
+        chart.bars[0].strokeColor = None
+        chart.bars[1].fillColor = colors.grey
+        chart.bars[1].strokeColor = None
+        chart.fillColor = cls.BACKGROUND_COLOR
+        chart.categoryAxis.labels.fontName = cls.FONT_NAME
+
+        chart.valueAxis.labels.fontName = cls.FONT_NAME
+        chart.valueAxis.labels.fontSize = 6
+
+        return chart
+
+    @classmethod
+    def create_line_chart(cls, width: float) -> HorizontalLineChart:
+        chart = HorizontalLineChart()
+        chart.width = width
+        chart.fillColor = cls.BACKGROUND_COLOR
+
+        # Every line except the first (the company itself) is dashed
+        chart.lines.strokeDashArray = (4, 2)
+        chart.lines[0].strokeDashArray = None
+
+        chart.valueAxis.labels.fontName = cls.FONT_NAME
+        chart.categoryAxis.visible = False
+
+        return chart
+
+    @staticmethod
+    def bind_vertical_bar_chart(chart: VerticalBarChart, data: dict, height: int) -> VerticalBarChart:
+        chart.height = height
+        chart.data = data['values']
+        chart.categoryAxis.categoryNames = data['category_names']
+
+        # Missing values are None and left out of the chart
+        values = [value for series in data['values'] for value in series if value is not None]
+        chart.valueAxis.valueMin = min(values) * 1.1
+        chart.valueAxis.valueMax = max(values) * 1.1
+
+        return chart
+
+    @staticmethod
+    def bind_line_chart(chart: HorizontalLineChart, profiles: list, height: int) -> HorizontalLineChart:
+        chart.height = height
+        chart.data = [profile.get('data', None) for profile in profiles]
+
+        for i, profile in enumerate(profiles):
+            chart.lines[i].strokeColor = HexColor(profile['color'])
+
+        chart.valueAxis.valueMax = max(
+            max(profile.get('data', None)) for profile in profiles) * 1.05
+
+        return chart
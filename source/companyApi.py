@@ -1,11 +1,17 @@
 import os
 import io
+import base64
+import threading
 import yfinance as yf
 import requests
-from typing import Optional
+from typing import Any, Callable, Optional
 from datetime import datetime, timedelta
 from alpha_vantage.timeseries import TimeSeries
 
+from source.infoLoader import InfoLoader
+from source.statementCache import StatementCache
+from source.snapshot import Snapshot
+
 
 class CompanyApi(object):
     ticker: str
@@ -20,9 +26,20 @@ class CompanyApi(object):
         'YEN': '¥'
     }
 
-    def __init__(self, ticker: str, exchange: str) -> None:
+    INCOME_STATEMENT_FIELDS = ['fiscalDateEnding', 'totalRevenue', 'netIncome', 'netIncomeMargin']
+
+    CASH_FLOW_FIELDS = ['fiscalDateEnding', 'operatingCashflow', 'freeCashFlowEstimate']
+
+    # Optional rate limiters per service ('alpha_vantage', 'yahoo', 'eodhd') shared by all instances
+    RATE_LIMITERS = {}
+
+    # yf.download keeps its results in module level state, so downloads are not run concurrently
+    DOWNLOAD_LOCK = threading.Lock()
+
+    def __init__(self, ticker: str, exchange: str, snapshot: Optional[Snapshot] = None) -> None:
         self.ticker = ticker
         self.exchange = exchange
+        self.snapshot = snapshot
         self.logo_url = None
 
         try:
@@ -34,8 +51,7 @@ class CompanyApi(object):
 
     def set_yfinance_handle(self) -> None:
         try:
-            self.yfinance_handle = yf.Ticker(self.ticker)
-            self.info = self.yfinance_handle.info
+            self.info = self.from_snapshot('info', self.load_info)
             if self.info['quoteType'] != 'EQUITY':
                 raise Exception(
                     self.ticker + " does not seem to be a valid company stock ticker.")
@@ -47,29 +63,62 @@ class CompanyApi(object):
         try:
             self.alpha_vantage_handle = TimeSeries(
                 key=os.environ.get("ALPHA_VANTAGE_API_KEY"))
-            self.income_statements = self.get_income_statements()
-            self.cash_flow_statements = self.get_cash_flow_statements()
+            income_statements = self.from_snapshot('incomeStatements', self.get_income_statements)
+            self.income_statements = income_statements['annualReports']
+            self.quarterly_income_statements = income_statements['quarterlyReports']
+
+            cash_flow_statements = self.from_snapshot('cashFlowStatements', self.get_cash_flow_statements)
+            self.cash_flow_statements = cash_flow_statements['annualReports']
+            self.quarterly_cash_flow_statements = cash_flow_statements['quarterlyReports']
         except Exception as e:
             raise Exception(
                 f"Failed to initialize Alpha Vantage API with the provided key. Error: {str(e)}")
 
-    def get_logo(self) -> Optional[io.BytesIO]:
-        response = requests.get(f'https://eodhd.com/img/logos/{self.exchange}/{self.ticker.lower()}.png')
+    def from_snapshot(self, key: str, load: Callable[[], Any]) -> Any:
+        if self.snapshot is not None:
+            value = self.snapshot.lookup(ticker=self.ticker, exchange=self.exchange, key=key)
+            if value is not None:
+                return value
 
-        if response.status_code == 404: 
-            response = requests.get(f'https://eodhd.com/img/logos/{self.exchange}/{self.ticker}.png')
+        return load()
+
+    @classmethod
+    def throttle(cls, service: str) -> None:
+        if service in cls.RATE_LIMITERS:
+            cls.RATE_LIMITERS[service].acquire()
+
+    def load_info(self) -> dict:
+        self.throttle('yahoo')
+        return InfoLoader(ticker=self.ticker).load()
+
+    def get_logo(self) -> Optional[io.BytesIO]:
+        # The snapshot keeps an empty string for companies without a logo
+        logo = base64.b64decode(self.from_snapshot('logo', self.fetch_logo_as_base64))
     
         temp_path = "resources/temp/company-logo.png"
         
-        if response.status_code == 200:
+        if logo:
             with open(temp_path, "wb") as f:
-                f.write(response.content)
+                f.write(logo)
             return temp_path
 
 
         print(f'Could not find an image for {self.ticker}, proceeding without it.')
         return None
 
+    def fetch_logo_as_base64(self) -> str:
+        self.throttle('eodhd')
+        response = requests.get(f'https://eodhd.com/img/logos/{self.exchange}/{self.ticker.lower()}.png')
+
+        if response.status_code == 404: 
+            self.throttle('eodhd')
+            response = requests.get(f'https://eodhd.com/img/logos/{self.exchange}/{self.ticker}.png')
+
+        if response.status_code == 200:
+            return base64.b64encode(response.content).decode('ascii')
+
+        return ''
+
     def set_currency(self) -> None:
 
         if not 'currency' in self.info.keys():
@@ -114,18 +163,81 @@ class CompanyApi(object):
                 number /= 1000
 
     @staticmethod
-    def calculate_cagr(annualReports: dict, num_years: int, key: str) -> float:
+    def to_float(value) -> Optional[float]:
+        # Alpha Vantage reports missing values as "None"
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def are_consecutive(reports: list, days: int) -> bool:
+        # Periods are consecutive when their ends are about one period apart, allowing for 52/53 week years
+        dates = [datetime.strptime(report['fiscalDateEnding'], '%Y-%m-%d') for report in reports]
+
+        return all(
+            abs((later - earlier).days - days) <= 20
+            for later, earlier in zip(dates, dates[1:])
+        )
+
+    @classmethod
+    def calculate_cagr(cls, annualReports: dict, num_years: int, key: str) -> Optional[float]:
         if len(annualReports) < num_years:
             raise Exception(
                 "Not enough historical data to accurately value the company."
             )
 
-        ending_value = float(annualReports[0][key])
-        beginning_value = float(annualReports[num_years - 1][key])
+        if not cls.are_consecutive(annualReports[:num_years], days=365):
+            return None
+
+        ending_value = cls.to_float(annualReports[0][key])
+        beginning_value = cls.to_float(annualReports[num_years - 1][key])
+
+        if ending_value is None or not beginning_value:
+            return None
+
         sign = 1 if ending_value >= beginning_value else -1
 
         return sign * abs((ending_value / beginning_value) ** (1 / num_years) - 1)
 
+    @classmethod
+    def calculate_ttm(cls, quarterlyReports: list, key: str, offset: int = 0) -> Optional[float]:
+        quarters = quarterlyReports[offset:offset + 4]
+
+        if len(quarters) < 4 or not cls.are_consecutive(quarters, days=91):
+            return None
+
+        values = [cls.to_float(report[key]) for report in quarters]
+
+        return None if None in values else sum(values)
+
+    @classmethod
+    def calculate_ttm_growth(cls, quarterlyReports: list, key: str) -> Optional[float]:
+        # Both windows have to be consecutive, and so does the step between them
+        if len(quarterlyReports) < 8 or not cls.are_consecutive(quarterlyReports[:8], days=91):
+            return None
+
+        current_value = cls.calculate_ttm(quarterlyReports, key)
+        previous_value = cls.calculate_ttm(quarterlyReports, key, offset=4)
+
+        if current_value is None or not previous_value:
+            return None
+
+        return (current_value - previous_value) / abs(previous_value)
+
+    def format_optional_percentage(self, number: Optional[float]) -> str:
+        return 'N/A' if number is None else self.format_percentage(number)
+
+    @classmethod
+    def get_ttm_for_bar_chart(cls, annualReports: list, quarterlyReports: list, keys: list) -> Optional[list]:
+        # Trailing twelve months only add information once a quarter has passed since the last annual report
+        if not quarterlyReports or (annualReports and quarterlyReports[0]['fiscalDateEnding'] <= annualReports[0]['fiscalDateEnding']):
+            return None
+
+        values = [cls.calculate_ttm(quarterlyReports, key) for key in keys]
+
+        return None if None in values else [value / 1000000 for value in values]
+
     def get_introductory_metrics_for_box_column(self) -> list:
         return [
             {
@@ -153,47 +265,85 @@ class CompanyApi(object):
     def get_revenue_and_earnings_data_for_box_column(self) -> list:
         return [
             {
-                'value': self.format_percentage(self.calculate_cagr(self.income_statements, 3, "totalRevenue")),
+                'value': self.format_optional_percentage(self.calculate_cagr(self.income_statements, 3, "totalRevenue")),
                 'description': '3 year total revenue CAGR.'
             },
             {
-                'value': self.format_percentage(self.calculate_cagr(self.income_statements, 3, "netIncome")),
+                'value': self.format_optional_percentage(self.calculate_cagr(self.income_statements, 3, "netIncome")),
                 'description': '3 year net income CAGR.'
             },
             {
-                'value': self.format_percentage(self.calculate_cagr(self.income_statements, min(10, len(self.income_statements)), "totalRevenue")),
+                'value': self.format_optional_percentage(self.calculate_cagr(self.income_statements, min(10, len(self.income_statements)), "totalRevenue")),
                 'description': '10 year total revenue CAGR.'
             },
             {
-                'value': self.format_percentage(self.calculate_cagr(self.income_statements, min(10, len(self.income_statements)), "netIncome")),
+                'value': self.format_optional_percentage(self.calculate_cagr(self.income_statements, min(10, len(self.income_statements)), "netIncome")),
                 'description': '10 year net income CAGR.'
             },
             {
-                'value': self.format_percentage(self.calculate_cagr(self.income_statements, min(10, len(self.income_statements)), "netIncomeMargin")),
+                'value': self.format_optional_percentage(self.calculate_cagr(self.income_statements, min(10, len(self.income_statements)), "netIncomeMargin")),
                 'description': '10 year income margin CAGR.'
+            },
+            {
+                'value': self.format_optional_percentage(self.calculate_ttm_growth(self.quarterly_income_statements, "totalRevenue")),
+                'description': 'TTM total revenue growth YoY.'
             }
         ]
 
     def get_operating_cash_flow_and_free_cash_flow_data_for_box_column(self) -> list:
         return [
             {
-                'value': self.format_percentage(self.calculate_cagr(self.cash_flow_statements, 3, "operatingCashflow")),
+                'value': self.format_optional_percentage(self.calculate_cagr(self.cash_flow_statements, 3, "operatingCashflow")),
                 'description': '3 year OCF CAGR.'
             },
             {
-                'value': self.format_percentage(self.calculate_cagr(self.cash_flow_statements, 3, "freeCashFlowEstimate")),
+                'value': self.format_optional_percentage(self.calculate_cagr(self.cash_flow_statements, 3, "freeCashFlowEstimate")),
                 'description': '3 year FCF CAGR.'
             },
             {
-                'value': self.format_percentage(self.calculate_cagr(self.cash_flow_statements, min(10, len(self.cash_flow_statements)), "operatingCashflow")),
+                'value': self.format_optional_percentage(self.calculate_cagr(self.cash_flow_statements, min(10, len(self.cash_flow_statements)), "operatingCashflow")),
                 'description': '10 year OCF CAGR.'
             },
             {
-                'value': self.format_percentage(self.calculate_cagr(self.cash_flow_statements, min(10, len(self.cash_flow_statements)), "freeCashFlowEstimate")),
+                'value': self.format_optional_percentage(self.calculate_cagr(self.cash_flow_statements, min(10, len(self.cash_flow_statements)), "freeCashFlowEstimate")),
                 'description': '10 year FCF CAGR.'
             },
+            {
+                'value': self.format_optional_percentage(self.calculate_ttm_growth(self.quarterly_cash_flow_statements, "freeCashFlowEstimate")),
+                'description': 'TTM FCF growth YoY.'
+            },
         ]
 
+    def get_metrics_for_archive(self) -> dict:
+        ten_years_income = min(10, len(self.income_statements))
+        ten_years_cash_flow = min(10, len(self.cash_flow_statements))
+
+        return {
+            'symbol': self.get_symbol(),
+            'exchange': self.exchange,
+            'name': self.get_name(),
+            'currency': self.info['currency'],
+            'market_cap': self.info.get('marketCap'),
+            'total_revenue': self.info.get('totalRevenue'),
+            'ebitda_margin': self.info.get('ebitdaMargins'),
+            'pe': self.info.get('trailingPE'),
+            'dividend_yield': self.info.get('trailingAnnualDividendYield', 0.0),
+            'revenue_cagr_3y': self.calculate_cagr(self.income_statements, 3, "totalRevenue"),
+            'net_income_cagr_3y': self.calculate_cagr(self.income_statements, 3, "netIncome"),
+            'revenue_cagr_10y': self.calculate_cagr(self.income_statements, ten_years_income, "totalRevenue"),
+            'net_income_cagr_10y': self.calculate_cagr(self.income_statements, ten_years_income, "netIncome"),
+            'net_income_margin_cagr_10y': self.calculate_cagr(self.income_statements, ten_years_income, "netIncomeMargin"),
+            'ocf_cagr_3y': self.calculate_cagr(self.cash_flow_statements, 3, "operatingCashflow"),
+            'fcf_cagr_3y': self.calculate_cagr(self.cash_flow_statements, 3, "freeCashFlowEstimate"),
+            'ocf_cagr_10y': self.calculate_cagr(self.cash_flow_statements, ten_years_cash_flow, "operatingCashflow"),
+            'fcf_cagr_10y': self.calculate_cagr(self.cash_flow_statements, ten_years_cash_flow, "freeCashFlowEstimate"),
+            'ttm_revenue': self.calculate_ttm(self.quarterly_income_statements, "totalRevenue"),
+            'ttm_net_income': self.calculate_ttm(self.quarterly_income_statements, "netIncome"),
+            'ttm_fcf': self.calculate_ttm(self.quarterly_cash_flow_statements, "freeCashFlowEstimate"),
+            'ttm_revenue_growth': self.calculate_ttm_growth(self.quarterly_income_statements, "totalRevenue"),
+            'ttm_fcf_growth': self.calculate_ttm_growth(self.quarterly_cash_flow_statements, "freeCashFlowEstimate"),
+        }
+
     def get_historical_price_data_for_line_chart(self, tickers_to_compare: list, start_date: str = None) -> dict:
 
         if start_date == None:
@@ -206,20 +356,63 @@ class CompanyApi(object):
             'name': self.get_name(),
         })
 
+        # The company and the indices it is compared to are downloaded in one request
+        closing_prices = self.get_monthly_closing_prices(
+            tickers=[ticker['ticker'] for ticker in tickers_to_compare], start_date=start_date)
+
         for ticker in tickers_to_compare:
-            # Download ticker data
-            ticker_data = yf.download(
-                ticker['ticker'], start=start_date, interval="1mo")['Close']
+            if ticker['ticker'] not in closing_prices:
+                raise Exception(f'Could not download the share prices of {ticker["ticker"]}.')
 
             # Calculate the factor to apply on all values
-            x = 100 / ticker_data.iloc[0]
+            x = 100 / closing_prices[ticker['ticker']][0]
 
             # Format data and put it in dict
-            ticker['data'] = [(date.strftime('%Y-%m'), closing_price * x - 100)[1]
-                              for date, closing_price in zip(ticker_data.index, ticker_data)]
+            ticker['data'] = [closing_price * x - 100 for closing_price in closing_prices[ticker['ticker']]]
 
         return tickers_to_compare
 
+    def get_monthly_closing_prices(self, tickers: list, start_date: str) -> dict:
+        closing_prices = {}
+
+        if self.snapshot is not None:
+            for ticker in tickers:
+                if (prices := self.snapshot.lookup_prices(ticker)) is not None:
+                    closing_prices[ticker] = prices
+
+        missing = [ticker for ticker in tickers if ticker not in closing_prices]
+
+        if missing:
+            closing_prices.update(self.download_monthly_closing_prices(tickers=missing, start_date=start_date))
+
+        return closing_prices
+
+    @classmethod
+    def download_monthly_closing_prices(cls, tickers: list, start_date: str) -> dict:
+        # yfinance requests every ticker separately, so each one takes a slot
+        for _ in tickers:
+            cls.throttle('yahoo')
+
+        with cls.DOWNLOAD_LOCK:
+            ticker_data = yf.download(tickers, start=start_date, interval="1mo", progress=False)['Close']
+
+        # Older yfinance versions return a single series when only one ticker is downloaded
+        if not hasattr(ticker_data, 'columns'):
+            ticker_data = ticker_data.to_frame(name=tickers[0])
+
+        # Months before a listing are empty, a ticker that failed to download has no prices at all
+        return {
+            ticker: [float(closing_price) for closing_price in ticker_data[ticker].dropna()]
+            for ticker in tickers
+            if ticker in ticker_data.columns and ticker_data[ticker].notna().any()
+        }
+
+    @classmethod
+    def to_float_in_millions(cls, value) -> Optional[float]:
+        # Missing values stay None, the bar chart leaves them out
+        number = cls.to_float(value)
+        return None if number is None else number / 1000000
+
     def get_revenue_and_earnings_data_for_bar_chart(self) -> dict:
 
         data = {"category_names": [], "values": [[], []]}
@@ -228,9 +421,14 @@ class CompanyApi(object):
             data['category_names'].insert(0, str(datetime.strptime(
                 statements['fiscalDateEnding'], '%Y-%m-%d').year))
             data['values'][0].insert(
-                0, float(statements['totalRevenue']) / 1000000)
+                0, self.to_float_in_millions(statements['totalRevenue']))
             data['values'][1].insert(
-                0, float(statements['netIncome']) / 1000000)
+                0, self.to_float_in_millions(statements['netIncome']))
+
+        if ttm := self.get_ttm_for_bar_chart(self.income_statements, self.quarterly_income_statements, ['totalRevenue', 'netIncome']):
+            data['category_names'].append('TTM')
+            data['values'][0].append(ttm[0])
+            data['values'][1].append(ttm[1])
 
         return data
 
@@ -242,36 +440,70 @@ class CompanyApi(object):
             data['category_names'].insert(0, str(datetime.strptime(
                 statements['fiscalDateEnding'], '%Y-%m-%d').year))
             data['values'][0].insert(
-                0, float(statements['operatingCashflow']) / 1000000)
+                0, self.to_float_in_millions(statements['operatingCashflow']))
             data['values'][1].insert(
-                0, float(statements['freeCashFlowEstimate']) / 1000000)
+                0, self.to_float_in_millions(statements['freeCashFlowEstimate']))
+
+        if ttm := self.get_ttm_for_bar_chart(self.cash_flow_statements, self.quarterly_cash_flow_statements, ['operatingCashflow', 'freeCashFlowEstimate']):
+            data['category_names'].append('TTM')
+            data['values'][0].append(ttm[0])
+            data['values'][1].append(ttm[1])
 
         return data
 
     def get_income_statements(self) -> dict:
-        result = self.fetch("INCOME_STATEMENT")
+        return self.get_statements("INCOME_STATEMENT", self.parse_income_statement)
 
-        if not 'annualReports' in result:
-            raise Exception(result["Information"])
+    def get_cash_flow_statements(self) -> dict:
+        return self.get_statements("CASH_FLOW", self.parse_cash_flow_statement)
 
-        for annual_report in result['annualReports']:
-            annual_report["netIncomeMargin"] = float(
-                annual_report["netIncome"]) / float(annual_report["totalRevenue"])
+    def get_statements(self, function: str, parse) -> dict:
+        cache = StatementCache(ticker=self.ticker, function=function)
+        statements = cache.load()
 
-        return result['annualReports']
+        if not cache.is_due(statements):
+            return statements
 
-    def get_cash_flow_statements(self) -> dict:
-        result = self.fetch("CASH_FLOW")
+        result = self.fetch(function)
 
         if not 'annualReports' in result:
+            # Fall back to the cached history when Alpha Vantage refuses the request
+            if statements is not None:
+                return statements
             raise Exception(result["Information"])
 
-        for annual_report in result['annualReports']:
-            # Calculate Free Cash Flow (FCF) estimate
-            annual_report["freeCashFlowEstimate"] = float(annual_report["operatingCashflow"]) - float(
-                annual_report.get("depreciationDepletionAndAmortization", 0))
+        statements = cache.merge(statements=statements, result=result, parse=parse)
+        cache.save(statements)
+
+        return statements
+
+    @classmethod
+    def parse_income_statement(cls, report: dict) -> dict:
+        net_income = cls.to_float(report["netIncome"])
+        total_revenue = cls.to_float(report["totalRevenue"])
+
+        # A missing value only makes the derived field unavailable, the period itself is kept
+        report["netIncomeMargin"] = net_income / total_revenue \
+            if net_income is not None and total_revenue else None
+
+        return cls.select_fields(report, cls.INCOME_STATEMENT_FIELDS)
 
-        return result['annualReports']
+    @classmethod
+    def parse_cash_flow_statement(cls, report: dict) -> dict:
+        operating_cashflow = cls.to_float(report["operatingCashflow"])
+        depreciation = cls.to_float(report.get("depreciationDepletionAndAmortization", 0))
+
+        # Calculate Free Cash Flow (FCF) estimate
+        report["freeCashFlowEstimate"] = operating_cashflow - depreciation \
+            if operating_cashflow is not None and depreciation is not None else None
+
+        return cls.select_fields(report, cls.CASH_FLOW_FIELDS)
+
+    @staticmethod
+    def select_fields(report: dict, fields: list) -> dict:
+        # Drop the statement fields the report never reads as soon as they are parsed
+        return {key: report[key] for key in fields}
 
     def fetch(self, function) -> dict:
+        self.throttle('alpha_vantage')
         return requests.get(f'https://www.alphavantage.co/query?function={function}&symbol={self.ticker}&apikey={os.environ.get("ALPHA_VANTAGE_API_KEY")}').json()
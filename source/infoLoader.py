@@ -0,0 +1,162 @@
+import os
+import json
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+import yfinance as yf
+
+
+class InfoLoader(object):
+    ticker: str
+
+    PATH = "reports/cache/info"
+
+    # Fields that rarely change, kept for a day. trailingEps and trailingAnnualDividendRate
+    # are not used by the report but let the fast fields be derived from the price alone.
+    SLOW_FIELDS = [
+        'quoteType',
+        'currency',
+        'shortName',
+        'symbol',
+        'longBusinessSummary',
+        'totalRevenue',
+        'ebitdaMargins',
+        'trailingEps',
+        'trailingAnnualDividendRate',
+    ]
+
+    # Fields that move with the share price, currentPrice is the price the others were derived at
+    FAST_FIELDS = [
+        'currentPrice',
+        'marketCap',
+        'trailingPE',
+        'trailingAnnualDividendYield',
+    ]
+
+    SLOW_TTL = timedelta(days=1)
+
+    FAST_TTL = timedelta(minutes=15)
+
+    # Shared by every loader in the process, keyed by (ticker, 'slow' | 'fast')
+    # and bounded to the MAX_ENTRIES most recently used entries. Entries are also
+    # saved in PATH, so the next process starts from them.
+    cache = OrderedDict()
+
+    MAX_ENTRIES = 1024
+
+    lock = threading.Lock()
+
+    def __init__(self, ticker: str, path: str = None) -> None:
+        self.ticker = ticker
+        self.path = path if path is not None else self.PATH
+
+    def load(self) -> dict:
+        slow = self.get_cached('slow')
+        fast = self.get_cached('fast')
+
+        if self.is_fresh(slow, self.SLOW_TTL) and not self.is_fresh(fast, self.FAST_TTL):
+            fields = self.fetch_fast_fields(slow=slow[1], fast=fast[1] if fast else None)
+
+            if fields is not None:
+                fast = self.store('fast', fields)
+
+        if not self.is_fresh(slow, self.SLOW_TTL) or not self.is_fresh(fast, self.FAST_TTL):
+            # The full info payload is only requested when the slow fields expire
+            # or the price data is incomplete
+            info = yf.Ticker(self.ticker).info
+            slow = self.store('slow', self.select(info, self.SLOW_FIELDS))
+            fast = self.store('fast', self.select(info, self.FAST_FIELDS))
+
+        return {**slow[1], **fast[1]}
+
+    def fetch_fast_fields(self, slow: dict, fast: Optional[dict]) -> Optional[dict]:
+        # The market cap is scaled from the last full refresh, Yahoo's quick market cap only
+        # counts the shares of this listing and is off for companies with several share classes
+        if not fast or not fast.get('marketCap') or not fast.get('currentPrice'):
+            return None
+
+        try:
+            price = yf.Ticker(self.ticker).fast_info['lastPrice']
+        except Exception:
+            return None
+
+        if not price:
+            return None
+
+        fields = {
+            'currentPrice': price,
+            'marketCap': fast['marketCap'] * price / fast['currentPrice'],
+        }
+
+        # Yahoo leaves out the P/E when the earnings are negative, so does this
+        if slow.get('trailingEps', 0) > 0:
+            fields['trailingPE'] = price / slow['trailingEps']
+
+        if 'trailingAnnualDividendRate' in slow:
+            fields['trailingAnnualDividendYield'] = slow['trailingAnnualDividendRate'] / price
+
+        return fields
+
+    @staticmethod
+    def is_fresh(entry: Optional[Tuple[datetime, dict]], ttl: timedelta) -> bool:
+        return entry is not None and datetime.now() - entry[0] <= ttl
+
+    def get_cached(self, group: str) -> Optional[Tuple[datetime, dict]]:
+        with self.lock:
+            entry = self.cache.get((self.ticker, group))
+
+            if entry is not None:
+                self.cache.move_to_end((self.ticker, group))
+                return entry
+
+        entry = self.read(group)
+
+        if entry is not None:
+            self.remember(group, entry)
+
+        return entry
+
+    def store(self, group: str, fields: dict) -> Tuple[datetime, dict]:
+        entry = (datetime.now(), fields)
+
+        self.remember(group, entry)
+        self.write(group, entry)
+
+        return entry
+
+    def remember(self, group: str, entry: Tuple[datetime, dict]) -> None:
+        with self.lock:
+            self.cache[(self.ticker, group)] = entry
+            self.cache.move_to_end((self.ticker, group))
+
+            while len(self.cache) > self.MAX_ENTRIES:
+                self.cache.popitem(last=False)
+
+    def filepath(self, group: str) -> str:
+        return os.path.join(self.path, f'{self.ticker}-{group}.json')
+
+    def read(self, group: str) -> Optional[Tuple[datetime, dict]]:
+        try:
+            with open(self.filepath(group), 'r') as f:
+                entry = json.load(f)
+
+            return datetime.fromisoformat(entry['fetchedAt']), entry['fields']
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def write(self, group: str, entry: Tuple[datetime, dict]) -> None:
+        os.makedirs(self.path, exist_ok=True)
+
+        # Write to a temporary file first so a concurrent reader never sees a partial file
+        temp_path = f'{self.filepath(group)}.{os.getpid()}.{threading.get_ident()}.tmp'
+
+        with open(temp_path, 'w') as f:
+            json.dump({'fetchedAt': entry[0].isoformat(), 'fields': entry[1]}, f)
+
+        os.replace(temp_path, self.filepath(group))
+
+    @staticmethod
+    def select(info: dict, fields: list) -> dict:
+        return {key: info[key] for key in fields if info.get(key) is not None}
@@ -0,0 +1,53 @@
+import gc
+import tracemalloc
+
+from source.infoLoader import InfoLoader
+
+
+class MemoryBudget(object):
+    limit_mb: float
+
+    TOP_ALLOCATIONS = 10
+
+    def __init__(self, limit_mb: float) -> None:
+        if limit_mb <= 0:
+            raise Exception("The memory budget has to be a positive number of megabytes.")
+
+        self.limit_mb = limit_mb
+
+    def start(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def usage_mb(self) -> tuple:
+        current, peak = tracemalloc.get_traced_memory()
+        return current / 1024 ** 2, peak / 1024 ** 2
+
+    def check(self) -> bool:
+        current, _ = self.usage_mb()
+
+        if current <= self.limit_mb:
+            return True
+
+        # Over budget, drop the caches that can be rebuilt and see if that is enough
+        with InfoLoader.lock:
+            InfoLoader.cache.clear()
+        gc.collect()
+
+        current, _ = self.usage_mb()
+        return current <= self.limit_mb
+
+    def report(self) -> None:
+        current, peak = self.usage_mb()
+
+        print(f"Memory: {current:.1f} MB in use, {peak:.1f} MB at peak, budget {self.limit_mb:.1f} MB.")
+
+        if peak > self.limit_mb:
+            print(f"The peak exceeded the memory budget by {peak - self.limit_mb:.1f} MB.")
+
+        print(f"Top {self.TOP_ALLOCATIONS} allocations by line:")
+
+        statistics = tracemalloc.take_snapshot().statistics('lineno')
+
+        for statistic in statistics[:self.TOP_ALLOCATIONS]:
+            print(f"  {statistic}")
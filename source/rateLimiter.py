@@ -0,0 +1,25 @@
+import time
+import threading
+
+
+class RateLimiter(object):
+    requests_per_second: float
+
+    def __init__(self, requests_per_second: float) -> None:
+        if requests_per_second <= 0:
+            raise Exception("The rate limit has to be a positive number of requests per second.")
+
+        self.requests_per_second = requests_per_second
+        self.interval = 1 / requests_per_second
+        self.next_request_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        # Hand out evenly spaced time slots, the caller sleeps until its slot outside the lock
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_request_at)
+            self.next_request_at = slot + self.interval
+
+        if slot > now:
+            time.sleep(slot - now)
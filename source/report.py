@@ -1,9 +1,9 @@
 import os.path
 from datetime import date
-from typing import Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, Union
 
 from reportlab.pdfgen.canvas import Canvas
-from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
@@ -15,6 +15,30 @@ from reportlab.graphics.charts.barcharts import VerticalBarChart
 from reportlab.graphics.charts.linecharts import HorizontalLineChart
 
 from source.companyApi import CompanyApi
+from source.chartTemplates import ChartTemplates
+
+
+class Section(object):
+    load: Callable[[], Any]
+
+    measure: Callable[[Any], int]
+
+    render: Callable[[Any, int], int]
+
+    margin_bottom: int
+
+    fill_page: bool
+
+    def __init__(self, load: Callable[[], Any], measure: Callable[[Any], int], render: Callable[[Any, int], int], margin_bottom: int = 0, fill_page: bool = False) -> None:
+        # load fetches the data of the section, measure returns the height it needs
+        # and render draws it at y and returns the y below it. A section that fills
+        # the page is measured by its minimum height and takes the rest of the page.
+        self.load = load
+        self.measure = measure
+        self.render = render
+        self.margin_bottom = margin_bottom
+        self.fill_page = fill_page
+        self.data = None
 
 
 class Report(object):
@@ -41,7 +65,11 @@ class Report(object):
 
     LOGO_PATH = "resources/images/clover.png"
 
-    TOTAL_PAGE_COUNT = 2
+    MAX_WORKERS = 4
+
+    PAGE_TOP = HEIGHT - 64
+
+    LINE_CHART_MIN_HEIGHT = 250
 
     def __init__(self, company: CompanyApi, path: str) -> None:
         self.company = company
@@ -55,53 +83,108 @@ class Report(object):
         except Exception as e:
             raise Exception(e)
 
-        self.new_page()
+        self.sections = self.compose_sections()
 
-        self.y = self.add_business_summary(self.y)
+        self.load_sections()
 
-        self.y = self.add_box_column(
-            data=self.company.get_introductory_metrics_for_box_column(),
-            y=self.y
-        )
+        self.pages = self.paginate()
+        self.total_page_count = len(self.pages)
 
-        self.add_line_chart(
-            profiles=self.company.get_historical_price_data_for_line_chart(
-                tickers_to_compare=self.TICKERS_TO_COMPARE
+        for page in self.pages:
+            self.new_page()
+
+            for section in page:
+                self.y = section.render(section.data, self.y) - section.margin_bottom
+
+    def compose_sections(self) -> list:
+        return [
+            Section(
+                load=self.company.get_logo,
+                measure=lambda logo: self.measure_business_summary(logo=logo),
+                render=lambda logo, y: self.add_business_summary(y=y, logo=logo)
             ),
-            y=self.y
-        )
+            Section(
+                load=self.company.get_introductory_metrics_for_box_column,
+                measure=lambda data: self.measure_box_column(),
+                render=lambda data, y: self.add_box_column(data=data, y=y)
+            ),
+            Section(
+                load=lambda: self.company.get_historical_price_data_for_line_chart(
+                    tickers_to_compare=[dict(ticker) for ticker in self.TICKERS_TO_COMPARE]
+                ),
+                measure=lambda profiles: self.measure_line_chart(),
+                render=lambda profiles, y: self.add_line_chart(profiles=profiles, y=y),
+                fill_page=True
+            ),
+            Section(
+                load=self.company.get_revenue_and_earnings_data_for_bar_chart,
+                measure=lambda data: self.measure_vertical_bar_chart(
+                    heading="Figure 2: Revenue & earnings per year.",
+                    chart_height=175
+                ),
+                render=lambda data, y: self.add_vertical_bar_chart(
+                    data=data,
+                    heading="Figure 2: Revenue & earnings per year.",
+                    help_text="Total revenue & net income per year in millions of " +
+                    self.company.currency + ".",
+                    y=y,
+                    chart_height=175
+                )
+            ),
+            Section(
+                load=self.company.get_revenue_and_earnings_data_for_box_column,
+                measure=lambda data: self.measure_box_column(),
+                render=lambda data, y: self.add_box_column(data=data, y=y),
+                margin_bottom=20
+            ),
+            Section(
+                load=self.company.get_cash_flow_data_for_bar_chart,
+                measure=lambda data: self.measure_vertical_bar_chart(
+                    heading="Figure 3: Operating cash flow & free cash flow per year.",
+                    chart_height=175
+                ),
+                render=lambda data, y: self.add_vertical_bar_chart(
+                    data=data,
+                    heading="Figure 3: Operating cash flow & free cash flow per year.",
+                    help_text="Operating cash flow & free cash flow in millions of " +
+                    self.company.currency + ".",
+                    y=y,
+                    chart_height=175
+                )
+            ),
+            Section(
+                load=self.company.get_operating_cash_flow_and_free_cash_flow_data_for_box_column,
+                measure=lambda data: self.measure_box_column(),
+                render=lambda data, y: self.add_box_column(data=data, y=y)
+            ),
+        ]
 
-        self.new_page()
+    def load_sections(self) -> None:
+        # Sections do not depend on each other. The info and statements are loaded with the company,
+        # so the requests that overlap here are the logo and the one share price download.
+        with ThreadPoolExecutor(max_workers=self.MAX_WORKERS) as executor:
+            futures = [executor.submit(section.load) for section in self.sections]
 
-        self.y = self.add_vertical_bar_chart(
-            data=self.company.get_revenue_and_earnings_data_for_bar_chart(),
-            heading="Figure 2: Revenue & earnings per year.",
-            help_text="Total revenue & net income per year in millions of " +
-            self.company.currency + ".",
-            y=self.y,
-            chart_height=175
-        )
+            for section, future in zip(self.sections, futures):
+                section.data = future.result()
 
-        self.y = self.add_box_column(
-            data=self.company.get_revenue_and_earnings_data_for_box_column(),
-            y=self.y
-        )
+    def paginate(self) -> list:
+        page_height = self.PAGE_TOP - self.margin * 2
+        pages = [[]]
+        remaining_height = page_height
 
-        self.y -= 20
+        for section in self.sections:
+            height = section.measure(section.data) + section.margin_bottom
 
-        self.y = self.add_vertical_bar_chart(
-            data=self.company.get_cash_flow_data_for_bar_chart(),
-            heading="Figure 3: Operating cash flow & free cash flow per year.",
-            help_text="Operating cash flow & free cash flow in millions of " +
-            self.company.currency + ".",
-            y=self.y,
-            chart_height=175
-        )
+            # Start a new page when the section does not fit, a section taller than a page gets a page of its own
+            if pages[-1] and height > remaining_height:
+                pages.append([])
+                remaining_height = page_height
 
-        self.y = self.add_box_column(
-            data=self.company.get_operating_cash_flow_and_free_cash_flow_data_for_box_column(),
-            y=self.y
-        )
+            pages[-1].append(section)
+            remaining_height = 0 if section.fill_page else remaining_height - height
+
+        return pages
 
     def create_style(self, fontName: str, fontPath: str) -> list:
         if not os.path.isfile(path=fontPath):
@@ -131,7 +214,7 @@ class Report(object):
         self.add_header()
         self.add_footer()
 
-        self.y = self.HEIGHT - 64
+        self.y = self.PAGE_TOP
 
     def add_header(self) -> None:
         # Load and draw the icon
@@ -152,7 +235,7 @@ class Report(object):
         )
 
         self.add_text(
-            text=f'Page {self.pagesCount} of {self.TOTAL_PAGE_COUNT}.',
+            text=f'Page {self.pagesCount} of {self.total_page_count}.',
             size=7,
             x=-32,
             y=self.HEIGHT - 25,
@@ -224,8 +307,40 @@ class Report(object):
 
         return p.height
 
-    def add_business_summary(self, y: int) -> int:
-        if logo := self.company.get_logo():
+    def measure_text(self, text: str, size: int, x: int, aW: int = None) -> int:
+        if aW is None:
+            aW = self.WIDTH - x - self.margin
+
+        self.style.fontSize = size
+        p = Paragraph(text, style=self.style)
+        p.wrap(aW, self.HEIGHT)
+
+        return p.height
+
+    def measure_business_summary(self, logo: Optional[str] = None) -> int:
+        heading_height = self.measure_text(
+            text="%s (%s)" % (self.company.get_name(),
+                              self.company.get_symbol()),
+            size=20,
+            x=70 if logo else 0
+        )
+
+        return heading_height + 20 + self.measure_text(self.company.get_summary(), size=9, x=self.margin)
+
+    def measure_box_column(self, height=60, spacing_between_boxes=10) -> int:
+        return height + spacing_between_boxes * 2
+
+    def measure_vertical_bar_chart(self, heading: str, chart_height: int = 200) -> int:
+        return chart_height + self.measure_text(heading, size=16, x=self.margin) + 70
+
+    def measure_line_chart(self) -> int:
+        heading_height = self.measure_text(
+            "Figure 1: Share price over the last 10 years.", size=16, x=self.margin)
+
+        return self.LINE_CHART_MIN_HEIGHT + heading_height + 70
+
+    def add_business_summary(self, y: int, logo: Optional[str] = None) -> int:
+        if logo:
             self.canvas.drawImage(logo, 32, y-28, height=30, width=30, preserveAspectRatio=True, mask='auto')
 
         heading_height = self.add_heading_1(
@@ -287,25 +402,12 @@ class Report(object):
             aW=width - 20
         )
 
-    def add_vertical_bar_chart(self, data: list, heading: str, help_text: str, y: int, chart_height: int = 200) -> None:
-        chart = VerticalBarChart()
-        chart.strokeColor = colors.white
-        chart.width = self.WIDTH - self.margin * 2.6
-        chart.height = chart_height
-        chart.data = data['values']
-
-        chart.bars[0].fillColor = colors.black
-        chart.bars[0].strokeColor = None
-        chart.bars[1].fillColor = colors.grey
-        chart.bars[1].strokeColor = None
-        chart.fillColor = HexColor("#f5f5f5")
-        chart.categoryAxis.categoryNames = data['category_names']
-        chart.categoryAxis.labels.fontName = 'Consola'
-
-        chart.valueAxis.labels.fontName = 'Consola'
-        chart.valueAxis.labels.fontSize = 6
-        chart.valueAxis.valueMin = min(min(*data['values'])) * 1.1
-        chart.valueAxis.valueMax = max(max(*data['values'])) * 1.1
+    def add_vertical_bar_chart(self, data: list, heading: str, help_text: str, y: int, chart_height: int = 200) -> int:
+        chart = ChartTemplates.bind_vertical_bar_chart(
+            chart=ChartTemplates.vertical_bar_chart(width=self.WIDTH - self.margin * 2.6),
+            data=data,
+            height=chart_height
+        )
 
         return self.draw_chart(
             heading=heading,
@@ -314,7 +416,7 @@ class Report(object):
             y=y
         )
 
-    def add_line_chart(self, profiles: list, y: int) -> None:
+    def add_line_chart(self, profiles: list, y: int) -> int:
         # Add a heading 2
         headingHeight = self.add_heading_2(
             text="Figure 1: Share price over the last 10 years.",
@@ -328,22 +430,12 @@ class Report(object):
             y=y - headingHeight - 30
         )
 
-        # Create a line chart
-        chart = HorizontalLineChart()
-        chart.width = self.WIDTH - self.margin * 2.6
-        chart.height = y - self.margin * 2 - headingHeight - 70
-        chart.fillColor = HexColor("#f5f5f5")
-        chart.data = [profile.get('data', None) for profile in profiles]
-
-        for i, profile in enumerate(profiles):
-            chart.lines[i].strokeColor = HexColor(profile['color'])
-            if i:
-                chart.lines[i].strokeDashArray = (4, 2)
-
-        chart.valueAxis.labels.fontName = 'Consola'
-        chart.valueAxis.valueMax = max(
-            max(profile.get('data', None)) for profile in profiles) * 1.05
-        chart.categoryAxis.visible = False
+        # Bind the data to the line chart template
+        chart = ChartTemplates.bind_line_chart(
+            chart=ChartTemplates.line_chart(width=self.WIDTH - self.margin * 2.6),
+            profiles=profiles,
+            height=y - self.margin * 2 - headingHeight - 70
+        )
 
         # Create a ReportLab Drawing object
         drawing = Drawing(
@@ -388,7 +480,10 @@ class Report(object):
                 fill=1
             )
 
-    def draw_chart(self, heading: str, help_text: str, chart: Union[HorizontalLineChart, VerticalBarChart], y: int) -> None:
+        # The line chart fills the remainder of the page, at least LINE_CHART_MIN_HEIGHT
+        return self.margin * 2
+
+    def draw_chart(self, heading: str, help_text: str, chart: Union[HorizontalLineChart, VerticalBarChart], y: int) -> int:
 
         heading_height = self.add_heading_2(
             text=heading,
@@ -417,10 +512,15 @@ class Report(object):
         drawing.drawOn(
             canvas=self.canvas,
             x=32,
-            y=self.y - chart.height - heading_height - 70
+            y=y - chart.height - heading_height - 70
         )
 
-        return self.y - chart.height - heading_height - 70
+        return y - chart.height - heading_height - 70
 
     def save(self) -> None:
         self.canvas.save()
+
+        # Release the canvas and the loaded section data, the PDF has been written
+        del self.canvas
+        self.sections = None
+        self.pages = None
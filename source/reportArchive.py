@@ -0,0 +1,153 @@
+import os
+import threading
+from datetime import date
+from typing import List, Optional
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from source.companyApi import CompanyApi
+
+
+class ReportArchive(object):
+    path: str
+
+    PATH = "reports/archive"
+
+    PARTITIONING = ds.partitioning(
+        pa.schema([('date', pa.string())]),
+        flavor='hive'
+    )
+
+    KEY_COLUMNS = ['date', 'symbol', 'exchange']
+
+    METRICS = [
+        'market_cap',
+        'total_revenue',
+        'ebitda_margin',
+        'pe',
+        'dividend_yield',
+        'revenue_cagr_3y',
+        'net_income_cagr_3y',
+        'revenue_cagr_10y',
+        'net_income_cagr_10y',
+        'net_income_margin_cagr_10y',
+        'ocf_cagr_3y',
+        'fcf_cagr_3y',
+        'ocf_cagr_10y',
+        'fcf_cagr_10y',
+        'ttm_revenue',
+        'ttm_net_income',
+        'ttm_fcf',
+        'ttm_revenue_growth',
+        'ttm_fcf_growth',
+    ]
+
+    # Every date partition is a single file, so queries open one file per date
+    FILENAME = "reports.parquet"
+
+    # Symbols per row group, the statistics of a row group let --history skip the others
+    ROW_GROUP_SIZE = 256
+
+    # Appends rewrite the file of their date, so they are not run concurrently
+    lock = threading.Lock()
+
+    # Schema of a single archived file, the date column lives in the partition directory
+    SCHEMA = pa.schema(
+        [
+            ('symbol', pa.string()),
+            ('exchange', pa.string()),
+            ('name', pa.string()),
+            ('currency', pa.string()),
+        ] + [(metric, pa.float64()) for metric in METRICS]
+    )
+
+    def __init__(self, path: str = None) -> None:
+        self.path = path if path is not None else self.PATH
+
+    def append(self, company: CompanyApi, report_date: date = None) -> str:
+        if report_date is None:
+            report_date = date.today()
+
+        row = company.get_metrics_for_archive()
+
+        directory = os.path.join(self.path, f'date={report_date.isoformat()}')
+        filepath = os.path.join(directory, self.FILENAME)
+        os.makedirs(directory, exist_ok=True)
+
+        with self.lock:
+            rows = pq.read_table(filepath, schema=self.SCHEMA).to_pylist() \
+                if os.path.isfile(filepath) else []
+
+            # Regenerating a report on the same day replaces the row of the company
+            rows = [
+                existing for existing in rows
+                if (existing['symbol'], existing['exchange']) != (row['symbol'], row['exchange'])
+            ] + [row]
+
+            table = pa.Table.from_pylist(rows, schema=self.SCHEMA).sort_by([('symbol', 'ascending')])
+
+            # Write to a temporary file first so a concurrent query never reads a partial file,
+            # the dataset skips files starting with a dot
+            temp_path = os.path.join(directory, f'.{self.FILENAME}.{os.getpid()}.tmp')
+            pq.write_table(table, temp_path, row_group_size=self.ROW_GROUP_SIZE)
+            os.replace(temp_path, filepath)
+
+        return filepath
+
+    def dataset(self) -> ds.Dataset:
+        if not os.path.isdir(self.path):
+            raise Exception(f'No reports have been archived yet in "{self.path}".')
+
+        return ds.dataset(
+            self.path,
+            schema=self.SCHEMA.append(pa.field('date', pa.string())),
+            format='parquet',
+            partitioning=self.PARTITIONING
+        )
+
+    def latest_date(self) -> str:
+        dates = [
+            name.split('=', 1)[1] for name in os.listdir(self.path)
+            if name.startswith('date=')
+        ] if os.path.isdir(self.path) else []
+
+        if not dates:
+            raise Exception(f'No reports have been archived yet in "{self.path}".')
+
+        return max(dates)
+
+    def history(self, symbol: str, metrics: Optional[List[str]] = None, last: int = 10) -> List[dict]:
+        columns = self.KEY_COLUMNS + self.validate_metrics(metrics or self.METRICS)
+
+        table = self.dataset().to_table(
+            columns=columns,
+            filter=ds.field('symbol') == symbol.upper()
+        )
+
+        # Keep the last N reports but present them oldest first
+        table = table.sort_by([('date', 'descending')]).slice(0, last)
+
+        return table.sort_by([('date', 'ascending')]).to_pylist()
+
+    def top(self, metric: str, limit: int = 50, on: str = None) -> List[dict]:
+        self.validate_metrics([metric])
+
+        if on is None:
+            on = self.latest_date()
+
+        table = self.dataset().to_table(
+            columns=self.KEY_COLUMNS + ['name', metric],
+            filter=(ds.field('date') == on) & ds.field(metric).is_valid()
+        )
+
+        return table.sort_by([(metric, 'descending')]).slice(0, limit).to_pylist()
+
+    def validate_metrics(self, metrics: List[str]) -> List[str]:
+        for metric in metrics:
+            if metric not in self.METRICS:
+                raise Exception(
+                    f'Unknown metric "{metric}", choose from: {", ".join(self.METRICS)}.')
+
+        return list(metrics)
@@ -0,0 +1,186 @@
+import os
+import json
+import zlib
+import sqlite3
+import pathlib
+import threading
+from datetime import datetime
+from typing import Any, List, Optional
+
+
+class Snapshot(object):
+    path: str
+
+    PATH = "reports/snapshots"
+
+    # Bump when the layout of the snapshot file changes
+    VERSION = 2
+
+    # Every company and price history is a compressed JSON row of its own, so a report
+    # only reads the rows it needs. The name columns are kept uncompressed for search.
+    TABLES = [
+        'CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)',
+        'CREATE TABLE companies (key TEXT PRIMARY KEY, ticker TEXT NOT NULL, exchange TEXT NOT NULL, name TEXT NOT NULL, data BLOB NOT NULL)',
+        'CREATE TABLE prices (ticker TEXT PRIMARY KEY, data BLOB NOT NULL)',
+    ]
+
+    def __init__(self, path: str, connection: sqlite3.Connection) -> None:
+        self.path = path
+        self.connection = connection
+        self.lock = threading.Lock()
+
+        meta = dict(self.query('SELECT key, value FROM meta'))
+
+        if meta.get('version') != str(self.VERSION):
+            raise Exception(
+                f'The snapshot "{path}" has version {meta.get("version")}, expected version {self.VERSION}. Please build a new snapshot.')
+
+        self.built_at = datetime.fromisoformat(meta['builtAt'])
+        self.company = None
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def load(cls, path: str = None) -> 'Snapshot':
+        if path is None:
+            path = cls.latest()
+
+        if not os.path.isfile(path):
+            raise Exception(f'Can not find a snapshot at "{path}".')
+
+        try:
+            # Reports load their sections from several threads, queries are serialized by the lock
+            connection = sqlite3.connect(
+                f'{pathlib.Path(path).absolute().as_uri()}?mode=ro', uri=True, check_same_thread=False)
+            return cls(path=path, connection=connection)
+        except sqlite3.DatabaseError as e:
+            raise Exception(f'Can not read the snapshot at "{path}": {e}. Please build a new snapshot.')
+
+    @classmethod
+    def latest(cls, directory: str = None) -> str:
+        if directory is None:
+            directory = cls.PATH
+
+        # Snapshot file names start with their build time, so the latest sorts last
+        filenames = sorted(
+            filename for filename in os.listdir(directory) if filename.endswith('.sqlite')
+        ) if os.path.isdir(directory) else []
+
+        if not filenames:
+            raise Exception(f'No snapshots have been built yet in "{directory}".')
+
+        return os.path.join(directory, filenames[-1])
+
+    @classmethod
+    def write(cls, companies: dict, prices: dict, directory: str = None) -> str:
+        if directory is None:
+            directory = cls.PATH
+
+        built_at = datetime.now()
+        path = os.path.join(directory, f'{built_at.strftime("%Y%m%d-%H%M%S")}-snapshot.sqlite')
+        os.makedirs(directory, exist_ok=True)
+
+        connection = sqlite3.connect(path)
+
+        try:
+            with connection:
+                for table in cls.TABLES:
+                    connection.execute(table)
+
+                connection.executemany('INSERT INTO meta VALUES (?, ?)', [
+                    ('version', str(cls.VERSION)),
+                    ('builtAt', built_at.isoformat()),
+                ])
+
+                connection.executemany('INSERT INTO companies VALUES (?, ?, ?, ?, ?)', (
+                    (key, company['ticker'], company['exchange'],
+                     company['info'].get('shortName', company['ticker']), cls.encode(company))
+                    for key, company in companies.items()
+                ))
+
+                connection.executemany('INSERT INTO prices VALUES (?, ?)', (
+                    (ticker, cls.encode(closing_prices)) for ticker, closing_prices in prices.items()
+                ))
+        finally:
+            connection.close()
+
+        # Snapshots are never modified once built
+        os.chmod(path, 0o444)
+
+        return path
+
+    @staticmethod
+    def encode(value: Any) -> bytes:
+        return zlib.compress(json.dumps(value).encode('utf-8'))
+
+    @staticmethod
+    def decode(data: bytes) -> Any:
+        return json.loads(zlib.decompress(data).decode('utf-8'))
+
+    @staticmethod
+    def company_key(ticker: str, exchange: str) -> str:
+        return f'{ticker}.{exchange}'
+
+    def query(self, sql: str, parameters: tuple = ()) -> list:
+        with self.lock:
+            return self.connection.execute(sql, parameters).fetchall()
+
+    def lookup(self, ticker: str, exchange: str, key: str) -> Optional[Any]:
+        company_key = self.company_key(ticker, exchange)
+
+        # Only the company of the report is decoded, and only once
+        if self.company is None or self.company[0] != company_key:
+            rows = self.query('SELECT data FROM companies WHERE key = ?', (company_key,))
+            self.company = (company_key, self.decode(rows[0][0]) if rows else {})
+
+        value = self.company[1].get(key)
+        self.count(hit=value is not None)
+        return value
+
+    def lookup_prices(self, ticker: str) -> Optional[list]:
+        rows = self.query('SELECT data FROM prices WHERE ticker = ?', (ticker,))
+        value = self.decode(rows[0][0]) if rows else None
+        self.count(hit=value is not None)
+        return value
+
+    def count(self, hit: bool) -> None:
+        with self.lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def search(self, query: str) -> List[dict]:
+        query = query.lower()
+
+        # An exact ticker match wins over names containing the query
+        rows = self.query(
+            'SELECT ticker, exchange, name FROM companies WHERE lower(ticker) = ? OR lower(key) = ?',
+            (query, query)
+        ) or self.query(
+            "SELECT ticker, exchange, name FROM companies WHERE instr(lower(name), ?) > 0",
+            (query,)
+        )
+
+        return [
+            {
+                'Code': ticker,
+                'Exchange': exchange,
+                'Name': name,
+                'Country': 'N/A',
+            }
+            for ticker, exchange, name in rows
+        ]
+
+    def close(self) -> None:
+        # Releases the decoded company along with the connection once the report has been generated
+        with self.lock:
+            self.connection.close()
+            self.company = None
+
+    def report(self) -> None:
+        lookups = self.hits + self.misses
+        hit_rate = self.hits / lookups if lookups else 0.0
+        staleness = datetime.now() - self.built_at
+
+        print(f'Snapshot {os.path.basename(self.path)}: {self.hits} of {lookups} lookups served ({hit_rate:.0%} hit rate), built {staleness.total_seconds() / 3600:.1f} hours ago.')
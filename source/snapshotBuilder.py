@@ -0,0 +1,117 @@
+import csv
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Tuple
+
+from source.companyApi import CompanyApi
+from source.rateLimiter import RateLimiter
+from source.snapshot import Snapshot
+
+
+class SnapshotBuilder(object):
+    universe: List[Tuple[str, str]]
+
+    WORKERS = 8
+
+    # Tickers per yf.download, the share prices are downloaded in batches after the companies
+    PRICE_BATCH_SIZE = 100
+
+    # Requests per minute to each service, Alpha Vantage premium keys start at 75
+    REQUESTS_PER_MINUTE = {
+        'alpha_vantage': 75,
+        'yahoo': 120,
+        'eodhd': 600,
+    }
+
+    def __init__(self, universe: List[Tuple[str, str]], comparison_tickers: List[str], workers: int = None, requests_per_minute: Dict[str, float] = None) -> None:
+        self.universe = universe
+        self.comparison_tickers = comparison_tickers
+        self.workers = workers if workers is not None else self.WORKERS
+        self.requests_per_minute = {**self.REQUESTS_PER_MINUTE, **(requests_per_minute or {})}
+
+    @staticmethod
+    def read_universe(path: str) -> List[Tuple[str, str]]:
+        # One "TICKER,EXCHANGE" per line, empty lines and lines starting with # are skipped
+        with open(path, 'r', newline='') as f:
+            return [
+                (row[0].strip(), row[1].strip())
+                for row in csv.reader(f)
+                if row and row[0].strip() and not row[0].startswith('#')
+            ]
+
+    def build(self, directory: str = None) -> str:
+        for service, rate in self.requests_per_minute.items():
+            CompanyApi.RATE_LIMITERS[service] = RateLimiter(requests_per_second=rate / 60)
+
+        start_date = (datetime.now() - timedelta(days=10 * 365)).strftime('%Y-%m-%d')
+        companies = {}
+        prices = {}
+        failures = 0
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                futures = {
+                    executor.submit(self.fetch_company, ticker, exchange): (ticker, exchange)
+                    for ticker, exchange in self.universe
+                }
+
+                for count, future in enumerate(as_completed(futures), start=1):
+                    ticker, exchange = futures[future]
+
+                    try:
+                        company = future.result()
+                    except Exception as e:
+                        failures += 1
+                        print(f'[{count}/{len(futures)}] Skipping {ticker} ({exchange}): {e}')
+                        continue
+
+                    companies[Snapshot.company_key(ticker, exchange)] = company
+                    print(f'[{count}/{len(futures)}] Fetched {ticker} ({exchange}).')
+
+            # Missing share prices are fetched live when a report is generated, so they do not fail the build
+            tickers = list(dict.fromkeys(
+                [company['info']['symbol'] for company in companies.values()] + self.comparison_tickers
+            ))
+
+            for start in range(0, len(tickers), self.PRICE_BATCH_SIZE):
+                batch = tickers[start:start + self.PRICE_BATCH_SIZE]
+
+                try:
+                    prices.update(CompanyApi.download_monthly_closing_prices(tickers=batch, start_date=start_date))
+                    print(f'[{start + len(batch)}/{len(tickers)}] Downloaded share prices.')
+                except Exception as e:
+                    print(f'[{start + len(batch)}/{len(tickers)}] Could not download share prices: {e}')
+
+            missing = [ticker for ticker in tickers if ticker not in prices]
+            failures += len(missing)
+
+            if missing:
+                print(f'Skipping the share prices of {len(missing)} tickers: {", ".join(missing)}')
+        finally:
+            CompanyApi.RATE_LIMITERS.clear()
+
+        path = Snapshot.write(companies=companies, prices=prices, directory=directory)
+
+        print(f'Built a snapshot of {len(companies)} of {len(self.universe)} companies and the share prices of {len(prices)} of {len(tickers)} tickers ({failures} skipped): {path}')
+
+        return path
+
+    @staticmethod
+    def fetch_company(ticker: str, exchange: str) -> dict:
+        # Constructing the company warms the info and statement caches
+        company = CompanyApi(ticker=ticker, exchange=exchange)
+
+        return {
+            'ticker': ticker,
+            'exchange': exchange,
+            'info': company.info,
+            'incomeStatements': {
+                'annualReports': company.income_statements,
+                'quarterlyReports': company.quarterly_income_statements,
+            },
+            'cashFlowStatements': {
+                'annualReports': company.cash_flow_statements,
+                'quarterlyReports': company.quarterly_cash_flow_statements,
+            },
+            'logo': company.fetch_logo_as_base64(),
+        }
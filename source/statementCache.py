@@ -0,0 +1,101 @@
+import os
+import json
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+
+class StatementCache(object):
+    ticker: str
+
+    function: str
+
+    PATH = "reports/cache/statements"
+
+    PERIODS = ['annualReports', 'quarterlyReports']
+
+    # A new quarter is not expected before it has ended and been filed
+    NEXT_QUARTER_AFTER = timedelta(days=92 + 30)
+
+    # Once a new quarter is expected, check for it at most this often
+    RECHECK_AFTER = timedelta(days=1)
+
+    # The newest periods are parsed again on every refresh to pick up amended filings
+    REPARSE_LATEST = {
+        'annualReports': 2,
+        'quarterlyReports': 4,
+    }
+
+    def __init__(self, ticker: str, function: str, path: str = None) -> None:
+        self.ticker = ticker
+        self.function = function
+        self.filepath = os.path.join(
+            path if path is not None else self.PATH,
+            f'{ticker}-{function}.json'
+        )
+
+    def load(self) -> Optional[dict]:
+        if not os.path.isfile(self.filepath):
+            return None
+
+        try:
+            with open(self.filepath, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def is_due(self, statements: Optional[dict]) -> bool:
+        if not statements or not statements['quarterlyReports']:
+            return True
+
+        now = datetime.now()
+        latest_quarter = datetime.strptime(
+            statements['quarterlyReports'][0]['fiscalDateEnding'], '%Y-%m-%d')
+
+        return now - latest_quarter > self.NEXT_QUARTER_AFTER \
+            and now - datetime.fromisoformat(statements['fetchedAt']) > self.RECHECK_AFTER
+
+    def merge(self, statements: Optional[dict], result: dict, parse: Callable[[dict], dict]) -> dict:
+        merged = {'fetchedAt': datetime.now().isoformat()}
+
+        for period in self.PERIODS:
+            cached = {
+                report['fiscalDateEnding']: report
+                for report in (statements[period] if statements else [])
+            }
+
+            dates = sorted(
+                (report['fiscalDateEnding'] for report in result.get(period, [])),
+                reverse=True
+            )
+
+            # The response is the truth for the dates it covers, a cached period it no longer
+            # returns (a moved fiscal year end for example) is dropped. Older periods are kept.
+            reports = {
+                date: report for date, report in cached.items()
+                if not dates or date < dates[-1]
+            }
+
+            # Only the newest and the not yet cached periods are parsed, the rest reuse the cache
+            for report in result.get(period, []):
+                date = report['fiscalDateEnding']
+                reports[date] = cached[date] \
+                    if date in cached and date not in dates[:self.REPARSE_LATEST[period]] else parse(report)
+
+            merged[period] = sorted(
+                reports.values(),
+                key=lambda report: report['fiscalDateEnding'],
+                reverse=True
+            )
+
+        return merged
+
+    def save(self, statements: dict) -> None:
+        os.makedirs(os.path.dirname(self.filepath), exist_ok=True)
+
+        # Write to a temporary file first so a concurrent reader never sees a partial file
+        temp_path = f'{self.filepath}.{os.getpid()}.tmp'
+
+        with open(temp_path, 'w') as f:
+            json.dump(statements, f)
+
+        os.replace(temp_path, self.filepath)